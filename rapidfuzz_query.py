@@ -13,18 +13,27 @@ Behavior:
 - Otherwise show suggestions
 
 Prereqs:
-  pip install mariadb rapidfuzz
+  pip install -r requirements.txt
+  (uses mysqlclient when installed, see requirements-optional.txt,
+   otherwise falls back to PyMySQL)
 
 Recommended DB schema additions (once):
   - PERSON_NAME_NORM (stored) + PERSON_NAME_KEY (stored) + index on KEY
   - optional FULLTEXT on PERSON_NAME_NORM
 """
 
+import functools
+import json
 import os
-import re
+import sqlite3
 import sys
+import threading
 import time
-from typing import List, Dict, Tuple, Any, Optional
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Dict, Tuple, Any, Optional, Sequence
 
 try:
     from dotenv import load_dotenv
@@ -33,19 +42,40 @@ try:
 except ImportError:
     pass
 
-import pymysql
+import numpy as np
+from dbutils.pooled_db import PooledDB
 from rapidfuzz import process, fuzz
 
+try:
+    from pybloom_live import BloomFilter
+except ImportError:
+    BloomFilter = None
+
+try:
+    # mysqlclient (C extension): much faster row decoding on large candidate fetches
+    import MySQLdb as dbapi
+except ImportError:
+    import pymysql as dbapi
+
 # ----------------------------
 # Config (tune as needed)
 # ----------------------------
 AUTO_SCORE = 90          # auto-correct threshold
 MIN_MARGIN = 5           # score1 - score2 must be >= MIN_MARGIN to auto-correct
 TOP_K = 10               # suggestions shown
+SCORE_CUTOFF = 60        # candidates scoring below this are never suggested
 PREFIX_LIMIT = 5000      # candidates fetched for prefix
 FTX_LIMIT = 20000        # candidates fetched for fulltext fallback
 LIKE_LIMIT = 20000       # last resort fallback
 MIN_CANDIDATES_OK = 200  # if prefix yields >= this, skip fallbacks
+STREAM_CHUNK = 2000      # rows scored per batch when streaming fallback results
+BATCH_SQL_CHUNK = 200    # distinct names per batch_check chunk (one exact-match query)
+BATCH_PREFIX_CHUNK = 16  # prefixes per batch_check UNION ALL (bounds pages held: x PREFIX_LIMIT rows)
+CACHE_MAX_ENTRIES = 10000  # per in-process result cache (LRU)
+PREFIX_CACHE_MAX_ROWS = 200000  # candidate rows kept in the prefix page cache (LRU, all pages)
+TEXT_CACHE_MAX = 16384   # memoized normalize_name / to_key / build_boolean_query results
+DISK_CACHE_TTL_S = 30 * 86400  # persistent cache entries older than this are purged
+BLOOM_ERROR_RATE = 0.01  # false-positive rate of the exact-match Bloom filter
 
 PERSON_TABLE = "T_WC_T2S_PERSON"
 COL_ID_PERSON = "ID_PERSON"
@@ -53,6 +83,8 @@ COL_PERSON_NAME = "PERSON_NAME"
 COL_PERSON_NAME_NORM = "PERSON_NAME_NORM"
 COL_PERSON_NAME_KEY = "PERSON_NAME_KEY"
 COL_POPULARITY = "POPULARITY"
+# Optional Mroonga shadow table (ID + normalized name) for substring search
+PERSON_TABLE_SUBSTR = os.getenv("MROONGA_TABLE", "")
 
 # Environment variables (recommended)
 DB_HOST = os.getenv("DB_HOST", "127.0.0.1")
@@ -61,19 +93,56 @@ DB_USER = os.getenv("DB_USER", "root")
 DB_PASS = os.getenv("DB_PASS", "")
 DB_NAME = os.getenv("DB_NAME", "")
 
+# Connection pool sizing (DBUtils PooledDB)
+POOL_MINCACHED = 5
+POOL_MAXCACHED = 10
+POOL_MAXCONNECTIONS = 25
+
+# SQLite file persisting search results across runs (opt-in: empty disables it in the CLI)
+RF_CACHE_DB = os.getenv("RF_CACHE_DB", "")
+
+# Preload a Bloom filter of PERSON_NAME_NORM at startup (needs pybloom-live)
+BLOOM_FILTER = os.getenv("BLOOM_FILTER", "0").strip().lower() in {"1", "true", "yes", "on"}
+
+# Run the FULLTEXT fallback concurrently with the prefix query (second pooled connection)
+PARALLEL_FETCH = os.getenv("PARALLEL_FETCH", "0").strip().lower() in {"1", "true", "yes", "on"}
+
+# Use server-side prepared statements for the hot fixed-shape queries (MariaDB >= 10.2.3)
+DB_PREPARED = os.getenv("DB_PREPARED", "0").strip().lower() in {"1", "true", "yes", "on"}
+
+# Set when the FULLTEXT index on PERSON_NAME_NORM uses `WITH PARSER ngram`
+FTX_NGRAM = os.getenv("FTX_NGRAM", "0").strip().lower() in {"1", "true", "yes", "on"}
+
 TIMINGS = os.getenv("TIMINGS", "0").strip().lower() in {"1", "true", "yes", "on"}
 
 # ----------------------------
 # Normalization (should match your generated columns logic)
 # ----------------------------
-_rx_non_alnum_space = re.compile(r"[^0-9a-zA-ZÀ-ÿ ]+")
-_rx_spaces = re.compile(r"\s+")
+class _NormTable(dict):
+    """`str.translate` table: kept characters map to themselves, all others to a space."""
+
+    def __missing__(self, codepoint: int) -> str:
+        return " "
+
+# Kept characters, same set as the former regex [0-9a-zA-ZÀ-ÿ ]
+_NORM_TABLE = _NormTable(
+    (cp, chr(cp))
+    for cp in (
+        *range(ord("0"), ord("9") + 1),
+        *range(ord("a"), ord("z") + 1),
+        *range(ord("A"), ord("Z") + 1),
+        *range(ord("À"), ord("ÿ") + 1),
+        ord(" "),
+    )
+)
 
+@functools.lru_cache(maxsize=TEXT_CACHE_MAX)
 def normalize_name(s: str) -> str:
     """Normalize a person name for matching.
 
     Lowercases, strips, removes non-alphanumeric characters (keeping spaces),
-    and collapses whitespace.
+    and collapses whitespace. Done with one `str.translate` pass plus
+    `split()`/`join()` rather than regex substitutions.
 
     Args:
         s: Raw input string.
@@ -81,11 +150,9 @@ def normalize_name(s: str) -> str:
     Returns:
         Normalized string.
     """
-    s = (s or "").strip().lower()
-    s = _rx_non_alnum_space.sub(" ", s)
-    s = _rx_spaces.sub(" ", s).strip()
-    return s
+    return " ".join((s or "").lower().translate(_NORM_TABLE).split())
 
+@functools.lru_cache(maxsize=TEXT_CACHE_MAX)
 def to_key(s: str) -> str:
     """Build a compact key version of a name for prefix lookups.
 
@@ -97,31 +164,252 @@ def to_key(s: str) -> str:
     """
     return normalize_name(s).replace(" ", "")
 
-def build_boolean_query(tokens: List[str]) -> str:
+@functools.lru_cache(maxsize=TEXT_CACHE_MAX)
+def build_boolean_query(tokens: Tuple[str, ...]) -> str:
     """Build a MariaDB FULLTEXT boolean query from normalized tokens.
 
-    Tokens of length >= 4 get a trailing '*' for prefix matching.
+    Tokens of length >= 4 get a trailing '*' for prefix matching. With an
+    ngram FULLTEXT parser (`FTX_NGRAM`), every token is emitted as `+token`:
+    the n-gram index already matches substrings, including short tokens.
 
     Args:
-        tokens: List of normalized tokens.
+        tokens: Tuple of normalized tokens (a tuple so results can be memoized).
 
     Returns:
         A boolean-mode query string suitable for `AGAINST (... IN BOOLEAN MODE)`.
     """
+    if FTX_NGRAM:
+        return " ".join(f"+{t}" for t in tokens)
+
     # MariaDB boolean mode: +token* forces token presence, * is prefix
-    parts = []
-    for t in tokens:
-        if len(t) >= 4:
-            parts.append(f"+{t}*")
-        else:
-            parts.append(f"+{t}")
-    return " ".join(parts)
+    return " ".join([f"+{t}*" if len(t) >= 4 else f"+{t}" for t in tokens])
+
+def key_prefix(q_key: str) -> str:
+    """Return the leading part of a key used for the prefix lookup.
+
+    Args:
+        q_key: Key form of the query (see `to_key()`).
+
+    Returns:
+        The first 6 characters (or the whole key when shorter).
+    """
+    prefix_len = 6 if len(q_key) >= 6 else max(3, len(q_key))
+    return q_key[:prefix_len]
+
+# ----------------------------
+# Candidate batches (structure of arrays)
+# ----------------------------
+@dataclass(slots=True)
+class CandBatch:
+    """Candidate rows stored as parallel column lists.
+
+    `norms` feeds `process.cdist` directly; the other lists are only indexed
+    for the final top-K, so no per-row dict is built while scoring.
+    """
+
+    ids: List[Any] = field(default_factory=list)
+    names: List[str] = field(default_factory=list)
+    norms: List[str] = field(default_factory=list)
+    pops: List[Any] = field(default_factory=list)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Tuple[Any, ...]]) -> "CandBatch":
+        """Build a batch from `(id, name, norm, popularity)` tuples."""
+        batch = cls()
+        for pid, name, norm, pop in rows:
+            batch.ids.append(pid)
+            batch.names.append(name)
+            batch.norms.append(norm or "")
+            batch.pops.append(pop)
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def copy(self) -> "CandBatch":
+        """Return a shallow copy whose lists can be extended independently."""
+        return CandBatch(list(self.ids), list(self.names), list(self.norms), list(self.pops))
+
+    def extend(self, other: "CandBatch") -> None:
+        """Append all rows of `other`."""
+        self.ids.extend(other.ids)
+        self.names.extend(other.names)
+        self.norms.extend(other.norms)
+        self.pops.extend(other.pops)
+
+    def take(self, indices: Sequence[int]) -> "CandBatch":
+        """Return a new batch with the rows at `indices`, in that order."""
+        return CandBatch(
+            [self.ids[i] for i in indices],
+            [self.names[i] for i in indices],
+            [self.norms[i] for i in indices],
+            [self.pops[i] for i in indices],
+        )
+
+# ----------------------------
+# In-process result caches (keyed on normalized query)
+# ----------------------------
+_SENTINEL = object()
+_exact_cache: "OrderedDict[Tuple[str, str], Optional[Dict[str, Any]]]" = OrderedDict()
+_ranked_cache: "OrderedDict[Tuple[str, str], Tuple[int, List[Dict[str, Any]]]]" = OrderedDict()
+_prefix_cache: "OrderedDict[Tuple[str, str, str], CandBatch]" = OrderedDict()
+# Guards the LRUs above: get + move_to_end must not interleave with another
+# thread's eviction (search_first_match() may be called from worker threads)
+_cache_lock = threading.Lock()
+
+def _cache_get(cache: OrderedDict, key: Any, default: Any = None) -> Any:
+    """Return a cached value and mark it as most recently used."""
+    with _cache_lock:
+        value = cache.get(key, _SENTINEL)
+        if value is _SENTINEL:
+            return default
+        cache.move_to_end(key)
+        return value
+
+def _cache_put(cache: OrderedDict, key: Any, value: Any, maxsize: int = CACHE_MAX_ENTRIES) -> None:
+    """Store a value, evicting the least recently used entries beyond `maxsize`."""
+    with _cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > maxsize:
+            cache.popitem(last=False)
+
+_prefix_cache_rows = 0  # total rows held by _prefix_cache
+
+def _prefix_cache_put(key: Tuple[str, str, str], batch: CandBatch) -> None:
+    """Store a prefix page, evicting the oldest pages beyond `PREFIX_CACHE_MAX_ROWS` rows.
+
+    Pages are up to `PREFIX_LIMIT` rows each, so the cache is bounded by rows
+    held rather than by page count. A page larger than the budget is not kept.
+    """
+    global _prefix_cache_rows
+    if len(batch) > PREFIX_CACHE_MAX_ROWS:
+        return
+    with _cache_lock:
+        old = _prefix_cache.pop(key, None)
+        if old is not None:
+            _prefix_cache_rows -= len(old)
+        _prefix_cache[key] = batch
+        _prefix_cache_rows += len(batch)
+        while _prefix_cache_rows > PREFIX_CACHE_MAX_ROWS:
+            _evicted_key, evicted = _prefix_cache.popitem(last=False)
+            _prefix_cache_rows -= len(evicted)
+
+def clear_caches() -> None:
+    """Drop all cached exact-match, ranking and prefix-page results.
+
+    Also empties the persistent SQLite cache when one is open.
+    """
+    global _prefix_cache_rows
+    with _cache_lock:
+        _exact_cache.clear()
+        _ranked_cache.clear()
+        _prefix_cache.clear()
+        _prefix_cache_rows = 0
+    if _disk_cache is not None:
+        with _disk_lock, _disk_cache:
+            _disk_cache.execute("DELETE FROM rf")
+
+# ----------------------------
+# Persistent result cache (SQLite)
+# ----------------------------
+_disk_cache: Optional[sqlite3.Connection] = None
+_disk_lock = threading.Lock()
+
+def open_disk_cache(path: str) -> None:
+    """Open (or create) the SQLite file mirroring search results across runs.
+
+    Entries older than `DISK_CACHE_TTL_S` are purged on open.
+
+    Args:
+        path: SQLite database file path.
+    """
+    global _disk_cache
+    conn = sqlite3.connect(path, check_same_thread=False)
+    with conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS rf (
+                tbl TEXT NOT NULL,
+                q TEXT NOT NULL,
+                result TEXT NOT NULL,
+                ts INTEGER NOT NULL,
+                PRIMARY KEY (tbl, q)
+            )
+        """)
+        conn.execute("DELETE FROM rf WHERE ts < ?", (int(time.time()) - DISK_CACHE_TTL_S,))
+    _disk_cache = conn
+
+def close_disk_cache() -> None:
+    """Close the persistent cache if open."""
+    global _disk_cache
+    if _disk_cache is not None:
+        _disk_cache.close()
+        _disk_cache = None
+
+def _disk_key(
+    strtablename: str,
+    q_norm: str,
+    has_fulltext: bool,
+    strtablesubstr: Optional[str],
+) -> Tuple[str, str]:
+    """Return the persistent cache key for a query.
+
+    A stored ranking depends on the settings below as well as on the query,
+    so they are folded into the table part of the key: after a config change
+    old entries are simply not found (and expire with `DISK_CACHE_TTL_S`).
+    """
+    settings = (
+        TOP_K,
+        SCORE_CUTOFF,
+        PREFIX_LIMIT,
+        FTX_LIMIT,
+        LIKE_LIMIT,
+        MIN_CANDIDATES_OK,
+        FTX_NGRAM,
+        has_fulltext,
+        strtablesubstr or "",
+    )
+    return (f"{strtablename}|{json.dumps(settings)}", q_norm)
+
+def _disk_cache_get(key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+    """Return a stored search result for a `_disk_key()` key, or None."""
+    if _disk_cache is None:
+        return None
+    with _disk_lock:
+        row = _disk_cache.execute(
+            "SELECT result FROM rf WHERE tbl = ? AND q = ? AND ts >= ?",
+            (key[0], key[1], int(time.time()) - DISK_CACHE_TTL_S),
+        ).fetchone()
+    return json.loads(row[0]) if row else None
+
+def _disk_cache_put(key: Tuple[str, str], result: Dict[str, Any]) -> None:
+    """Store a search result for a `_disk_key()` key."""
+    _disk_cache_put_many([(key, result)])
+
+def _disk_cache_put_many(entries: Sequence[Tuple[Tuple[str, str], Dict[str, Any]]]) -> None:
+    """Store several `(_disk_key(), result)` entries in one transaction."""
+    if _disk_cache is None or not entries:
+        return
+    now = int(time.time())
+    # default=float: DECIMAL popularity values come back as Decimal
+    rows = [(key[0], key[1], json.dumps(result, default=float), now) for key, result in entries]
+    with _disk_lock, _disk_cache:
+        _disk_cache.executemany(
+            "INSERT OR REPLACE INTO rf (tbl, q, result, ts) VALUES (?, ?, ?, ?)",
+            rows,
+        )
 
 # ----------------------------
 # DB Helpers
 # ----------------------------
+_POOL: Optional[PooledDB] = None
+
 def get_db_connection():
-    """Create a PyMySQL connection using environment variables.
+    """Get a pooled DB connection configured from environment variables.
+
+    The pool is created on first use and shared by the whole process, so the
+    TCP/auth handshake is paid once per pooled connection instead of per call.
+    Calling `close()` on the returned connection hands it back to the pool.
 
     Uses `DictCursor` so `fetchone()` / `fetchall()` return dictionaries.
     Expects MySQL/MariaDB parameter style `%s`.
@@ -130,26 +418,72 @@ def get_db_connection():
         DB_HOST, DB_PORT, DB_USER, DB_PASS/DB_PASSWORD, DB_NAME
 
     Returns:
-        A live `pymysql.Connection`.
+        A live pooled connection wrapping a `MySQLdb` (mysqlclient) or
+        `pymysql` connection, whichever driver was imported.
     """
-    strdbhost = os.getenv("DB_HOST", DB_HOST)
-    lngdbport = int(os.getenv("DB_PORT", str(DB_PORT)))
-    strdbuser = os.getenv("DB_USER", DB_USER)
-    strdbpassword = os.getenv("DB_PASSWORD") or os.getenv("DB_PASS", DB_PASS)
-    strdbname = os.getenv("DB_NAME", DB_NAME)
-
-    if not strdbname:
-        print("ERROR: Set DB_NAME env var (and DB_HOST/DB_USER/DB_PASS as needed).", file=sys.stderr)
-        sys.exit(1)
-
-    return pymysql.connect(
-        host=strdbhost,
-        port=lngdbport,
-        user=strdbuser,
-        password=strdbpassword,
-        database=strdbname,
-        cursorclass=pymysql.cursors.DictCursor,
-    )
+    global _POOL
+    if _POOL is None:
+        strdbhost = os.getenv("DB_HOST", DB_HOST)
+        lngdbport = int(os.getenv("DB_PORT", str(DB_PORT)))
+        strdbuser = os.getenv("DB_USER", DB_USER)
+        strdbpassword = os.getenv("DB_PASSWORD") or os.getenv("DB_PASS", DB_PASS)
+        strdbname = os.getenv("DB_NAME", DB_NAME)
+
+        if not strdbname:
+            print("ERROR: Set DB_NAME env var (and DB_HOST/DB_USER/DB_PASS as needed).", file=sys.stderr)
+            sys.exit(1)
+
+        _POOL = PooledDB(
+            creator=dbapi,
+            mincached=POOL_MINCACHED,
+            maxcached=POOL_MAXCACHED,
+            maxconnections=POOL_MAXCONNECTIONS,
+            blocking=True,
+            host=strdbhost,
+            port=lngdbport,
+            user=strdbuser,
+            password=strdbpassword,
+            database=strdbname,
+            cursorclass=dbapi.cursors.DictCursor,
+        )
+    return _POOL.connection()
+
+# Prepared statement names per raw connection (statements are session-scoped)
+_prepared_stmts: "weakref.WeakKeyDictionary[Any, Dict[str, str]]" = weakref.WeakKeyDictionary()
+ER_UNKNOWN_STMT_HANDLER = 1243
+
+def execute_prepared(cur, sql: str, params: Tuple[Any, ...]) -> None:
+    """Execute `sql` as a server-side prepared statement when `DB_PREPARED` is set.
+
+    The statement is prepared once per connection (`PREPARE ... FROM`) and then
+    run with `EXECUTE ... USING <values>`, so the server skips re-parsing the SQL.
+    Passing values directly in `USING` needs MariaDB >= 10.2.3 and keeps it to
+    one round trip per call. Without `DB_PREPARED`, this is `cur.execute()`.
+
+    Args:
+        cur: A DB cursor.
+        sql: Query text with `%s` placeholders (literal `%` written as `%%`).
+        params: Query parameters.
+    """
+    if not DB_PREPARED:
+        cur.execute(sql, params)
+        return
+
+    stmts = _prepared_stmts.setdefault(cur.connection, {})
+    for attempt in range(2):
+        name = stmts.get(sql)
+        if name is None:
+            name = f"rfq_stmt_{len(stmts)}"
+            cur.execute(f"PREPARE {name} FROM %s", (sql.replace("%s", "?").replace("%%", "%"),))
+            stmts[sql] = name
+        try:
+            cur.execute(f"EXECUTE {name} USING {', '.join(['%s'] * len(params))}", params)
+            return
+        except dbapi.Error as e:
+            # Statements are lost when the driver reconnects: prepare again once
+            if attempt or not e.args or e.args[0] != ER_UNKNOWN_STMT_HANDLER:
+                raise
+            stmts.clear()
 
 def db_has_norm_columns(
     cur,
@@ -196,6 +530,117 @@ def db_has_fulltext(
     )
     return cur.fetchone() is not None
 
+# Bloom filters of normalized names, per table (see load_name_filter())
+_name_filters: Dict[str, Any] = {}
+
+# (charset, collation) per (table, column), see db_column_collation()
+_column_collations: Dict[Tuple[str, str], Tuple[str, str]] = {}
+
+def db_column_collation(
+    cur,
+    strtablename: str,
+    strcolumnname: str,
+) -> Tuple[str, str]:
+    """Return the character set and collation of a column (cached per process).
+
+    Args:
+        cur: A DB cursor (DictCursor).
+
+    Returns:
+        Tuple of (charset, collation), empty strings if not found.
+    """
+    cached = _column_collations.get((strtablename, strcolumnname))
+    if cached is not None:
+        return cached
+    cur.execute("""
+        SELECT CHARACTER_SET_NAME AS cs, COLLATION_NAME AS coll
+        FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE()
+          AND TABLE_NAME = %s
+          AND COLUMN_NAME = %s
+    """, (strtablename, strcolumnname))
+    row = cur.fetchone()
+    if not row:
+        return ("", "")
+    if isinstance(row, dict):
+        row = (row["cs"], row["coll"])
+    result = (row[0] or "", row[1] or "")
+    _column_collations[(strtablename, strcolumnname)] = result
+    return result
+
+def db_norm_is_accent_sensitive(
+    cur,
+    strtablename: str,
+    strcolumndescnorm: str,
+) -> bool:
+    """Check whether `PERSON_NAME_NORM` compares strings exactly.
+
+    The Bloom filter holds exact strings, while `exact_match()` compares with
+    the column collation: under an accent-insensitive one (`utf8mb4_general_ci`,
+    `*_ai_ci`), `rene` matches a stored `rené` that the filter would rule out.
+    Only binary and accent+case-sensitive (`*_as_cs`) collations are accepted.
+
+    Args:
+        cur: A DB cursor (DictCursor).
+
+    Returns:
+        True if the column collation is binary or `*_as_cs`.
+    """
+    _charset, coll = db_column_collation(cur, strtablename, strcolumndescnorm)
+    return coll.endswith("_bin") or coll.endswith("_as_cs")
+
+def load_name_filter(
+    cur,
+    strtablename: str,
+    strcolumndescnorm: str,
+) -> bool:
+    """Load every normalized name of the table into a Bloom filter.
+
+    Once loaded, `search_first_match()` only runs the exact-match query when
+    the filter says the name may exist, saving a round trip on most misses.
+    Names inserted after loading are not seen by the filter (they are still
+    found by the fuzzy path); call again to refresh.
+
+    The filter requires a binary or accent-sensitive collation on
+    `PERSON_NAME_NORM` (see `db_norm_is_accent_sensitive()`); otherwise it is
+    not loaded, since it would hide matches the collation accepts.
+
+    Args:
+        cur: A DB cursor; its connection is used to stream the names.
+
+    Returns:
+        True if the filter was loaded, False if `pybloom-live` is not installed
+        or the column collation is not exact enough.
+    """
+    if BloomFilter is None:
+        return False
+    if not db_norm_is_accent_sensitive(cur, strtablename, strcolumndescnorm):
+        _name_filters.pop(strtablename, None)
+        return False
+
+    cur.execute(f"SELECT COUNT(*) AS cnt FROM `{strtablename}`")
+    row = cur.fetchone()
+    n = row["cnt"] if isinstance(row, dict) else row[0]
+    # Headroom for rows inserted while streaming: adding past capacity raises
+    bf = BloomFilter(capacity=int(n * 1.1) + 1000, error_rate=BLOOM_ERROR_RATE)
+
+    stream_cur = cur.connection.cursor(dbapi.cursors.SSCursor)
+    try:
+        stream_cur.execute(
+            f"SELECT `{strcolumndescnorm}` FROM `{strtablename}` WHERE `{strcolumndescnorm}` IS NOT NULL"
+        )
+        while True:
+            chunk = stream_cur.fetchmany(STREAM_CHUNK)
+            if not chunk:
+                break
+            for (norm,) in chunk:
+                bf.add(norm)
+    finally:
+        stream_cur.close()
+
+    _name_filters[strtablename] = bf
+    return True
+
 def exact_match(
     cur,
     strtablename: str,
@@ -215,7 +660,8 @@ def exact_match(
         A row dict if found, else None.
     """
     # Exact match on normalized form (fast with index on PERSON_NAME_NORM)
-    cur.execute(
+    execute_prepared(
+        cur,
         f"""
         SELECT `{strcolumnid}`, `{strcolumndesc}`, `{strcolumndescnorm}`, `{strcolumnpopularity}`
         FROM `{strtablename}`
@@ -229,6 +675,113 @@ def exact_match(
         return None
     return row
 
+def stream_top_candidates(
+    cur,
+    sql: str,
+    params: Tuple[Any, ...],
+    q_norm: str,
+    seen: set,
+    cancel: Optional[threading.Event] = None,
+) -> Tuple[CandBatch, int]:
+    """Run a candidate query unbuffered and keep only its best `TOP_K` rows.
+
+    Rows are read in `STREAM_CHUNK` batches from a server-side cursor on the
+    same connection, scored with RapidFuzz, and merged into a running top-K, so
+    a large fallback result is never materialized in memory. The K-th best
+    score so far is passed as `score_cutoff` for the following batches.
+    Once `cancel` is set, scoring stops at the next batch (the driver still
+    drains the remaining rows when the cursor is closed).
+
+    Args:
+        cur: A DB cursor; its connection is used for streaming.
+        sql: Candidate query selecting id, name, normalized name, popularity.
+        params: Query parameters.
+        q_norm: Normalized query string.
+        seen: Ids already collected; new ids are added to it and duplicates skipped.
+        cancel: Optional event telling a background caller's stream to stop.
+
+    Returns:
+        Tuple of (best rows, number of new rows streamed).
+    """
+    kept = CandBatch()
+    kept_scores = np.empty(0, dtype=np.uint8)
+    n_new = 0
+    stream_cur = cur.connection.cursor(dbapi.cursors.SSCursor)
+    try:
+        stream_cur.execute(sql, params)
+        while cancel is None or not cancel.is_set():
+            chunk = stream_cur.fetchmany(STREAM_CHUNK)
+            if not chunk:
+                break
+            fresh = []
+            for r in chunk:
+                if r[0] not in seen:
+                    seen.add(r[0])
+                    fresh.append(r)
+            if not fresh:
+                continue
+            n_new += len(fresh)
+            fresh_batch = CandBatch.from_rows(fresh)
+            # Once TOP_K rows are kept, anything below the current K-th best score
+            # cannot enter: let RapidFuzz exit early on those (their score becomes 0).
+            cutoff = max(SCORE_CUTOFF, float(kept_scores.min())) if len(kept) >= TOP_K else SCORE_CUTOFF
+            scores = wratio_scores([q_norm], fresh_batch.norms, cutoff)[0]
+            kept.extend(fresh_batch)
+            kept_scores = np.concatenate((kept_scores, scores))
+            if len(kept) > TOP_K:
+                idx = np.argpartition(kept_scores, -TOP_K)[-TOP_K:]
+                kept = kept.take(idx)
+                kept_scores = kept_scores[idx]
+    finally:
+        stream_cur.close()
+    return kept, n_new
+
+_fetch_executor: Optional[ThreadPoolExecutor] = None
+
+def _get_fetch_executor() -> ThreadPoolExecutor:
+    """Return the worker pool used by `PARALLEL_FETCH`, creating it on first use."""
+    global _fetch_executor
+    if _fetch_executor is None:
+        _fetch_executor = ThreadPoolExecutor(max_workers=POOL_MAXCONNECTIONS // 2)
+    return _fetch_executor
+
+def _stream_on_pooled_connection(
+    sql: str,
+    params: Tuple[Any, ...],
+    q_norm: str,
+    cancel: threading.Event,
+) -> Tuple[CandBatch, set, float]:
+    """Run `stream_top_candidates()` on its own pooled connection (worker thread).
+
+    `cancel` is set by the caller when it no longer needs the result.
+
+    Returns:
+        Tuple of (best rows, ids of all streamed rows, elapsed seconds).
+    """
+    t0 = time.perf_counter()
+    streamed: set = set()
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor()
+        try:
+            batch, _n = stream_top_candidates(cur, sql, params, q_norm, streamed, cancel)
+        finally:
+            cur.close()
+    finally:
+        conn.close()
+    return batch, streamed, time.perf_counter() - t0
+
+def _abandon_fetch(future: Future, cancel: threading.Event) -> None:
+    """Stop a background fetch whose result is not needed, reporting any failure."""
+    cancel.set()
+
+    def _report(done: Future) -> None:
+        exc = done.exception()
+        if exc is not None:
+            print(f"WARNING: background FULLTEXT fetch failed: {exc!r}", file=sys.stderr)
+
+    future.add_done_callback(_report)
+
 def fetch_candidates(
     cur,
     strtablename: str,
@@ -241,134 +794,286 @@ def fetch_candidates(
     q_key: str,
     has_fulltext: bool,
     timings: Optional[Dict[str, Any]] = None,
-) -> List[Tuple[int, str, str]]:
+    strtablesubstr: Optional[str] = None,
+    prefix_batch: Optional[CandBatch] = None,
+) -> CandBatch:
     """Fetch candidate rows that may match the query.
 
     Strategy:
-        1) Prefix lookup on `PERSON_NAME_KEY`.
+        1) Prefix `LIKE 'prefix%'` on `PERSON_NAME_KEY`.
         2) Optional FULLTEXT fallback on `PERSON_NAME_NORM`.
-        3) LIKE fallback as last resort.
+        3) Substring fallback as last resort: `LIKE '%token%'`, or an indexed
+           search on a Mroonga shadow table when `strtablesubstr` is given.
+
+    If prefix rows have a normalized name equal to `q_norm`, only those rows
+    are returned. Otherwise prefix rows are returned in full; fallback stages
+    are streamed and only contribute their best `TOP_K` rows (see
+    `stream_top_candidates()`).
+    Rows are read with tuple cursors straight into a `CandBatch`.
 
     Args:
-        cur: A DB cursor (DictCursor).
+        cur: A DB cursor; its connection is used for the candidate queries.
         q_norm: Normalized query string.
         q_key: Key form of query (normalized without spaces).
         has_fulltext: Whether FULLTEXT is available on `PERSON_NAME_NORM`.
         timings: Optional dict to store timing measurements.
+        strtablesubstr: Optional Mroonga table holding the id and normalized
+            name columns, used instead of the LIKE table scan.
+        prefix_batch: Prefix page already fetched by the caller (e.g.
+            `batch_check()`); skips the prefix query and its cache.
 
     Returns:
-        A list of row dicts with at least `ID_PERSON`, `PERSON_NAME`, `PERSON_NAME_NORM`.
+        A `CandBatch` of (id, name, normalized name, popularity) columns.
     """
     # 1) Prefix on PERSON_NAME_KEY (index-friendly)
-    prefix_len = 6 if len(q_key) >= 6 else max(3, len(q_key))
-    prefix = q_key[:prefix_len]
+    prefix = key_prefix(q_key)
+
+    tokens = sorted(q_norm.split(), key=len, reverse=True)[:3]  # longest tokens first
+    ftx_sql = f"""
+            SELECT `{strcolumnid}`, `{strcolumndesc}`, `{strcolumndescnorm}`, `{strcolumnpopularity}`
+            FROM `{strtablename}`
+            WHERE MATCH(`{strcolumndescnorm}`) AGAINST (%s IN BOOLEAN MODE)
+            LIMIT %s
+            """
+    ftx_params = (build_boolean_query(tuple(tokens)), FTX_LIMIT) if tokens else ()
+
+    # Consecutive inputs often share the same prefix: reuse the fetched page
+    prefix_key = (strtablename, strcolumndesckey, prefix)
+
+    # While the prefix query is in flight, start the FULLTEXT stage on a second
+    # pooled connection so its latency overlaps instead of adding up.
+    ftx_future: Optional[Future] = None
+    ftx_cancel = threading.Event()
+    if (
+        PARALLEL_FETCH
+        and has_fulltext
+        and tokens
+        and prefix_batch is None
+        and prefix_key not in _prefix_cache
+    ):
+        ftx_future = _get_fetch_executor().submit(
+            _stream_on_pooled_connection, ftx_sql, ftx_params, q_norm, ftx_cancel
+        )
 
     t0 = time.perf_counter() if timings is not None else 0.0
-    cur.execute(
-        f"""
-        SELECT `{strcolumnid}`, `{strcolumndesc}`, `{strcolumndescnorm}`, `{strcolumnpopularity}`
-        FROM `{strtablename}`
-        WHERE `{strcolumndesckey}` LIKE CONCAT(%s, '%%')
-        LIMIT %s
-        """,
-        (prefix, PREFIX_LIMIT),
-    )
-    rows = cur.fetchall() or []
+    cached_batch = prefix_batch if prefix_batch is not None else _cache_get(_prefix_cache, prefix_key)
+    if cached_batch is None:
+        tuple_cur = cur.connection.cursor(dbapi.cursors.Cursor)
+        try:
+            execute_prepared(
+                tuple_cur,
+                f"""
+                SELECT `{strcolumnid}`, `{strcolumndesc}`, `{strcolumndescnorm}`, `{strcolumnpopularity}`
+                FROM `{strtablename}`
+                WHERE `{strcolumndesckey}` LIKE CONCAT(%s, '%%')
+                LIMIT %s
+                """,
+                (prefix, PREFIX_LIMIT),
+            )
+            cached_batch = CandBatch.from_rows(tuple_cur.fetchall() or ())
+        finally:
+            tuple_cur.close()
+        _prefix_cache_put(prefix_key, cached_batch)
+    elif timings is not None:
+        timings["prefix_cached"] = True
+    batch = cached_batch.copy()
     if timings is not None:
         timings["prefix_s"] = time.perf_counter() - t0
-        timings["prefix_n"] = len(rows)
-    if len(rows) >= MIN_CANDIDATES_OK:
+        timings["prefix_n"] = len(batch)
+
+    # A row whose normalized name equals the query is a de-facto exact match
+    # the exact lookup missed (e.g. generated column not yet visible): keep
+    # only those rows so ranking skips the scorer.
+    exact_idx = [i for i, norm in enumerate(batch.norms) if norm == q_norm]
+    if exact_idx:
+        if ftx_future is not None:
+            _abandon_fetch(ftx_future, ftx_cancel)
+        if timings is not None:
+            timings["used"] = "prefix_exact"
+        return batch.take(exact_idx)
+
+    if len(batch) >= MIN_CANDIDATES_OK:
+        if ftx_future is not None:
+            _abandon_fetch(ftx_future, ftx_cancel)
         if timings is not None:
             timings["used"] = "prefix"
-        return rows
+        return batch
 
     # 2) FULLTEXT fallback (recommended)
-    tokens = [t for t in q_norm.split() if t]
-    tokens = sorted(tokens, key=len, reverse=True)[:3]  # longest tokens first
+    # Fallbacks can return tens of thousands of rows: stream them and keep only
+    # each stage's best TOP_K, which cannot change the final top-K ranking.
+    seen = set(batch.ids)
+    n_total = len(batch)
     if has_fulltext and tokens:
         t1 = time.perf_counter() if timings is not None else 0.0
-        ftx_query = build_boolean_query(tokens)
-        cur.execute(
-            f"""
-            SELECT `{strcolumnid}`, `{strcolumndesc}`, `{strcolumndescnorm}`, `{strcolumnpopularity}`
-            FROM `{strtablename}`
-            WHERE MATCH(`{strcolumndescnorm}`) AGAINST (%s IN BOOLEAN MODE)
-            LIMIT %s
-            """,
-            (ftx_query, FTX_LIMIT),
-        )
-        rows2 = cur.fetchall() or []
+        if ftx_future is not None:
+            batch2, streamed, ftx_s = ftx_future.result()
+            # Streamed without the prefix ids: drop rows already collected
+            batch2 = batch2.take([i for i, pid in enumerate(batch2.ids) if pid not in seen])
+            n2 = len(streamed - seen)
+            seen |= streamed
+        else:
+            batch2, n2 = stream_top_candidates(cur, ftx_sql, ftx_params, q_norm, seen)
+            ftx_s = time.perf_counter() - t1
         if timings is not None:
-            timings["fulltext_s"] = time.perf_counter() - t1
-            timings["fulltext_n"] = len(rows2)
-        if rows2:
-            seen = {r[strcolumnid] for r in rows}
-            rows.extend([r for r in rows2 if r[strcolumnid] not in seen])
-            if len(rows) >= MIN_CANDIDATES_OK:
+            timings["fulltext_s"] = ftx_s
+            timings["fulltext_n"] = n2
+        if n2:
+            batch.extend(batch2)
+            n_total += n2
+            if n_total >= MIN_CANDIDATES_OK:
                 if timings is not None:
                     timings["used"] = "fulltext"
-                return rows
+                return batch
 
     # 3) LIKE fallback (last resort)
     if tokens:
         t2 = time.perf_counter() if timings is not None else 0.0
         t = tokens[0]
-        cur.execute(
-            f"""
+        if strtablesubstr:
+            # The shadow table's bigram index (TokenBigramSplitSymbolAlphaDigit,
+            # which also splits letter runs) answers substring matches without
+            # a table scan; "*D+" makes every term mandatory.
+            sql = f"""
+            SELECT p.`{strcolumnid}`, p.`{strcolumndesc}`, p.`{strcolumndescnorm}`, p.`{strcolumnpopularity}`
+            FROM `{strtablesubstr}` m
+            JOIN `{strtablename}` p ON p.`{strcolumnid}` = m.`{strcolumnid}`
+            WHERE MATCH(m.`{strcolumndescnorm}`) AGAINST (%s IN BOOLEAN MODE)
+            LIMIT %s
+            """
+            params = (f"*D+ {t}", LIKE_LIMIT)
+        else:
+            sql = f"""
             SELECT `{strcolumnid}`, `{strcolumndesc}`, `{strcolumndescnorm}`, `{strcolumnpopularity}`
             FROM `{strtablename}`
             WHERE `{strcolumndescnorm}` LIKE CONCAT('%%', %s, '%%')
             LIMIT %s
-            """,
-            (t, LIKE_LIMIT),
-        )
-        rows3 = cur.fetchall() or []
+            """
+            params = (t, LIKE_LIMIT)
+        batch3, n3 = stream_top_candidates(cur, sql, params, q_norm, seen)
         if timings is not None:
             timings["like_s"] = time.perf_counter() - t2
-            timings["like_n"] = len(rows3)
-        if rows3:
-            seen = {r[strcolumnid] for r in rows}
-            rows.extend([r for r in rows3 if r[strcolumnid] not in seen])
+            timings["like_n"] = n3
+        batch.extend(batch3)
 
     if timings is not None and "used" not in timings:
         timings["used"] = "like" if tokens else "prefix"
 
-    return rows
+    return batch
 
 # ----------------------------
 # RapidFuzz decision logic
 # ----------------------------
+def wratio_scores(
+    queries: Sequence[str],
+    norms: Sequence[str],
+    score_cutoff: float = 0.0,
+) -> np.ndarray:
+    """Score normalized queries against normalized candidate names with WRatio.
+
+    WRatio scores lie in [0, 100], so they are returned as `uint8` (rounded):
+    a quarter of the memory of the default float32 matrix. They are only meant
+    for selecting the top-K; the reported `SCORE` is recomputed exactly (see
+    `_ranked_from_scores()`). Note that unary minus wraps on unsigned arrays;
+    select the top-K with `np.argpartition(scores, -k)[-k:]`, not on `-scores`.
+
+    Both sides are already normalized (`normalize_name()` on the query, the
+    stored `PERSON_NAME_NORM` generated column on the candidates), so
+    `processor=None` makes sure RapidFuzz does no per-candidate preprocessing
+    whatever its version's default; the choices go straight to the C++ scorer.
+
+    Args:
+        queries: Normalized query strings.
+        norms: Normalized candidate names.
+        score_cutoff: Scores below this are returned as 0 (lets WRatio exit early).
+
+    Returns:
+        A `(len(queries), len(norms))` `uint8` score matrix.
+    """
+    return process.cdist(
+        queries,
+        norms,
+        scorer=fuzz.WRatio,
+        processor=None,
+        score_cutoff=score_cutoff,
+        dtype=np.uint8,
+        workers=-1,
+    )
+
 def rank_candidates(
     strcolumnid: str,
     strcolumndesc: str,
     strcolumndescnorm: str,
     strcolumnpopularity: str,
     q_norm: str,
-    candidates: List[Dict[str, Any]],
+    candidates: CandBatch,
 ) -> List[Dict[str, Any]]:
     """Rank candidate rows by lexical similarity using RapidFuzz.
 
     Args:
         q_norm: Normalized query string.
-        candidates: Candidate row dicts.
+        candidates: Candidate batch from `fetch_candidates()`.
 
     Returns:
-        A list of dicts containing the candidate fields plus a `SCORE` float.
+        A list of dicts containing the candidate fields plus a `SCORE` float,
+        limited to candidates scoring at least `SCORE_CUTOFF`.
+    """
+    if not candidates:
+        return []
+
+    # Rows equal to the query score 100 by definition: no need to call WRatio
+    if all(norm == q_norm for norm in candidates.norms):
+        scores = np.full(len(candidates), 100, dtype=np.uint8)
+    else:
+        # Score all candidates in one vectorized call (C++, GIL released, all cores).
+        # score_cutoff lets WRatio bail out early on hopeless candidates (scored 0).
+        scores = wratio_scores([q_norm], candidates.norms, SCORE_CUTOFF)[0]
+
+    return _ranked_from_scores(
+        strcolumnid,
+        strcolumndesc,
+        strcolumndescnorm,
+        strcolumnpopularity,
+        q_norm,
+        candidates,
+        scores,
+    )
+
+def _ranked_from_scores(
+    strcolumnid: str,
+    strcolumndesc: str,
+    strcolumndescnorm: str,
+    strcolumnpopularity: str,
+    q_norm: str,
+    candidates: CandBatch,
+    scores: np.ndarray,
+) -> List[Dict[str, Any]]:
+    """Build the ranked suggestion dicts from one row of WRatio scores.
+
+    The rounded `uint8` scores only pick the top-K rows; their `SCORE` is then
+    recomputed as the exact float WRatio (K scalar calls), so `AUTO_SCORE`,
+    `MIN_MARGIN` and `SCORE_CUTOFF` compare against unrounded values.
     """
-    # Dict choices: id -> norm for scoring
-    choices = {row[strcolumnid]: row[strcolumndescnorm] for row in candidates}
-    matches = process.extract(q_norm, choices, scorer=fuzz.WRatio, limit=TOP_K)
+    # Top-K selection without sorting the whole score array
+    if len(scores) > TOP_K:
+        idx = np.argpartition(scores, -TOP_K)[-TOP_K:]
+    else:
+        idx = np.arange(len(scores))
+    idx = idx[np.argsort(scores[idx], kind="stable")[::-1]]
+    idx = idx[scores[idx] >= SCORE_CUTOFF]
 
-    id_to_row = {row[strcolumnid]: row for row in candidates}
     out = []
-    for _match, score, pid in matches:
-        r = id_to_row[pid]
+    for i in idx:
+        norm = candidates.norms[i]
+        score = 100.0 if norm == q_norm else fuzz.WRatio(q_norm, norm, processor=None)
+        if score < SCORE_CUTOFF:
+            continue
         out.append({
-            strcolumnid: r[strcolumnid],
-            strcolumndesc: r[strcolumndesc],
-            strcolumndescnorm: r[strcolumndescnorm],
-            strcolumnpopularity: r.get(strcolumnpopularity),
-            "SCORE": float(score),
+            strcolumnid: candidates.ids[i],
+            strcolumndesc: candidates.names[i],
+            strcolumndescnorm: norm,
+            strcolumnpopularity: candidates.pops[i],
+            "SCORE": score,
         })
 
     out.sort(
@@ -413,6 +1118,7 @@ def search_first_match(
     raw: str,
     has_fulltext: bool,
     timings_enabled: bool = False,
+    strtablesubstr: Optional[str] = None,
 ) -> Dict[str, Any]:
     """Search for a person name and return the best match.
 
@@ -430,6 +1136,7 @@ def search_first_match(
         raw: Raw user input.
         has_fulltext: Whether FULLTEXT is available.
         timings_enabled: If True, return timing details.
+        strtablesubstr: Optional Mroonga shadow table for the substring fallback.
 
     Returns:
         A dict with:
@@ -439,21 +1146,40 @@ def search_first_match(
             - best: best suggestion row or None
             - reason: reason string
             - timings: dict of timing breakdown (may be empty)
-            - candidates_count: number of candidates fetched
+            - candidates_count: number of candidates passed to ranking
     """
     q_norm = normalize_name(raw)
-    q_key = to_key(raw)
+    q_key = q_norm.replace(" ", "")  # same as to_key(raw), without normalizing twice
+
+    # Results only depend on the normalized query, so repeats skip the DB.
+    cache_key = (strtablename, q_norm)
+    disk_key = _disk_key(strtablename, q_norm, has_fulltext, strtablesubstr)
 
     t_exact0 = time.perf_counter() if timings_enabled else 0.0
-    hit = exact_match(
-        cur,
-        strtablename,
-        strcolumnid,
-        strcolumndesc,
-        strcolumndescnorm,
-        strcolumnpopularity,
-        q_norm,
-    )
+    hit = _cache_get(_exact_cache, cache_key, _SENTINEL)
+    if hit is _SENTINEL:
+        stored = _disk_cache_get(disk_key)
+        if stored is not None:
+            hit = stored["hit"]
+            if hit is None:
+                _cache_put(_ranked_cache, cache_key, (stored["candidates_count"], stored["ranked"]))
+        else:
+            name_filter = _name_filters.get(strtablename)
+            if name_filter is not None and q_norm not in name_filter:
+                hit = None  # definitely not stored: skip the round trip
+            else:
+                hit = exact_match(
+                    cur,
+                    strtablename,
+                    strcolumnid,
+                    strcolumndesc,
+                    strcolumndescnorm,
+                    strcolumnpopularity,
+                    q_norm,
+                )
+            if hit:
+                _disk_cache_put(disk_key, {"hit": hit})
+        _cache_put(_exact_cache, cache_key, hit)
     t_exact1 = time.perf_counter() if timings_enabled else 0.0
     if hit:
         return {
@@ -468,31 +1194,42 @@ def search_first_match(
 
     fetch_t = {} if timings_enabled else None
     t_fetch0 = time.perf_counter() if timings_enabled else 0.0
-    candidates = fetch_candidates(
-        cur,
-        strtablename,
-        strcolumnid,
-        strcolumndesc,
-        strcolumndescnorm,
-        strcolumndesckey,
-        strcolumnpopularity,
-        q_norm,
-        q_key,
-        has_fulltext,
-        timings=fetch_t,
-    )
-    t_fetch1 = time.perf_counter() if timings_enabled else 0.0
+    t_rank0 = t_rank1 = t_fetch1 = t_fetch0
+    cached = _cache_get(_ranked_cache, cache_key)
+    if cached is not None:
+        candidates_count, ranked = cached
+        if fetch_t is not None:
+            fetch_t["used"] = "cache"
+    else:
+        candidates = fetch_candidates(
+            cur,
+            strtablename,
+            strcolumnid,
+            strcolumndesc,
+            strcolumndescnorm,
+            strcolumndesckey,
+            strcolumnpopularity,
+            q_norm,
+            q_key,
+            has_fulltext,
+            timings=fetch_t,
+            strtablesubstr=strtablesubstr,
+        )
+        t_fetch1 = time.perf_counter() if timings_enabled else 0.0
 
-    t_rank0 = time.perf_counter() if timings_enabled else 0.0
-    ranked = rank_candidates(
-        strcolumnid,
-        strcolumndesc,
-        strcolumndescnorm,
-        strcolumnpopularity,
-        q_norm,
-        candidates,
-    )
-    t_rank1 = time.perf_counter() if timings_enabled else 0.0
+        t_rank0 = time.perf_counter() if timings_enabled else 0.0
+        ranked = rank_candidates(
+            strcolumnid,
+            strcolumndesc,
+            strcolumndescnorm,
+            strcolumnpopularity,
+            q_norm,
+            candidates,
+        )
+        t_rank1 = time.perf_counter() if timings_enabled else 0.0
+        candidates_count = len(candidates)
+        _cache_put(_ranked_cache, cache_key, (candidates_count, ranked))
+        _disk_cache_put(disk_key, {"hit": None, "ranked": ranked, "candidates_count": candidates_count})
 
     auto, _best, reason = decide_autocorrect(ranked)
     best = ranked[0] if ranked else None
@@ -511,14 +1248,347 @@ def search_first_match(
         "best": best,
         "reason": reason,
         "timings": timings,
-        "candidates_count": len(candidates),
+        "candidates_count": candidates_count,
     }
 
+def _search_result(
+    hit: Optional[Dict[str, Any]],
+    ranked: List[Dict[str, Any]],
+    candidates_count: int,
+) -> Dict[str, Any]:
+    """Build a result shaped like `search_first_match()` (without timings)."""
+    if hit:
+        return {
+            "hit": hit,
+            "ranked": [],
+            "auto": True,
+            "best": hit,
+            "reason": "exact",
+            "timings": {},
+            "candidates_count": 0,
+        }
+    auto, _best, reason = decide_autocorrect(ranked)
+    return {
+        "hit": None,
+        "ranked": ranked,
+        "auto": auto,
+        "best": ranked[0] if ranked else None,
+        "reason": reason,
+        "timings": {},
+        "candidates_count": candidates_count,
+    }
+
+def batch_check(
+    cur,
+    strtablename: str,
+    strcolumnid: str,
+    strcolumndesc: str,
+    strcolumndescnorm: str,
+    strcolumndesckey: str,
+    strcolumnpopularity: str,
+    names: Sequence[str],
+    has_fulltext: bool,
+    strtablesubstr: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Check many names at once, amortizing DB round trips and scoring.
+
+    Distinct normalized names are processed `BATCH_SQL_CHUNK` at a time, each
+    chunk end to end (see `_batch_check_chunk()`):
+        1) exact matches for the chunk come from one query joining the names
+           to `PERSON_NAME_NORM`;
+        2) the prefix pages of the chunk's misses come from `UNION ALL`
+           queries of `BATCH_PREFIX_CHUNK` prefixes, streamed;
+        3) names sharing a prefix are scored together with a single 2D
+           `process.cdist` call against that prefix's candidates, before the
+           next prefix query, so at most `BATCH_PREFIX_CHUNK` pages are held.
+    Names whose prefix page is too small (< `MIN_CANDIDATES_OK`) get the
+    FULLTEXT/LIKE fallbacks through `fetch_candidates()`.
+
+    Results are built directly, not read back from the LRU caches, so they do
+    not depend on the batch fitting in `CACHE_MAX_ENTRIES` /
+    `PREFIX_CACHE_MAX_ROWS`. The caches are still filled for later lookups.
+
+    Args:
+        cur: A DB cursor (DictCursor).
+        names: Raw user inputs.
+        has_fulltext: Whether FULLTEXT is available.
+        strtablesubstr: Optional Mroonga shadow table for the substring fallback.
+
+    Returns:
+        One result per input name, in order, shaped like `search_first_match()`
+        (with empty `timings`).
+    """
+    norms = [normalize_name(n) for n in names]
+    distinct = list(dict.fromkeys(norms))
+    results: Dict[str, Dict[str, Any]] = {}
+    for i in range(0, len(distinct), BATCH_SQL_CHUNK):
+        results.update(
+            _batch_check_chunk(
+                cur,
+                strtablename,
+                strcolumnid,
+                strcolumndesc,
+                strcolumndescnorm,
+                strcolumndesckey,
+                strcolumnpopularity,
+                distinct[i:i + BATCH_SQL_CHUNK],
+                has_fulltext,
+                strtablesubstr,
+            )
+        )
+    return [dict(results[q]) for q in norms]
+
+def _batch_check_chunk(
+    cur,
+    strtablename: str,
+    strcolumnid: str,
+    strcolumndesc: str,
+    strcolumndescnorm: str,
+    strcolumndesckey: str,
+    strcolumnpopularity: str,
+    chunk: Sequence[str],
+    has_fulltext: bool,
+    strtablesubstr: Optional[str],
+) -> Dict[str, Dict[str, Any]]:
+    """Resolve up to `BATCH_SQL_CHUNK` distinct normalized names for `batch_check()`.
+
+    Returns:
+        A result per normalized name.
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    probe: List[str] = []
+    misses: List[str] = []
+
+    # Names already answered by the in-process or SQLite cache
+    for q in chunk:
+        cache_key = (strtablename, q)
+        hit = _cache_get(_exact_cache, cache_key, _SENTINEL)
+        ranked_entry = None
+        if hit is _SENTINEL:
+            stored = _disk_cache_get(_disk_key(strtablename, q, has_fulltext, strtablesubstr))
+            if stored is not None:
+                hit = stored["hit"]
+                if hit is None:
+                    ranked_entry = (stored["candidates_count"], stored["ranked"])
+        elif not hit:
+            ranked_entry = _cache_get(_ranked_cache, cache_key)
+        if hit is _SENTINEL:
+            probe.append(q)
+        elif hit:
+            results[q] = _search_result(hit, [], 0)
+        elif ranked_entry is not None:
+            results[q] = _search_result(None, ranked_entry[1], ranked_entry[0])
+        else:
+            misses.append(q)
+
+    name_filter = _name_filters.get(strtablename)
+    if name_filter is not None:
+        misses.extend(q for q in probe if q not in name_filter)
+        probe = [q for q in probe if q in name_filter]
+
+    disk_entries: List[Tuple[Tuple[str, str], Dict[str, Any]]] = []
+
+    # 1) Exact matches in bulk. Each row carries the probed value, so equality
+    # is decided by the column collation exactly as in exact_match().
+    found: Dict[str, Dict[str, Any]] = {}
+    if probe:
+        # Derived-table columns are IMPLICIT like the column itself: without an
+        # explicit collation, a connection collation that differs from the
+        # column's makes the join fail with "Illegal mix of collations".
+        charset, coll = db_column_collation(cur, strtablename, strcolumndescnorm)
+        if charset.isidentifier() and coll.isidentifier():
+            q_expr = f"CONVERT(%s USING {charset}) COLLATE {coll}"
+        else:
+            q_expr = "%s"
+        tuple_cur = cur.connection.cursor(dbapi.cursors.Cursor)
+        try:
+            tuple_cur.execute(
+                f"""
+                SELECT q.q, p.`{strcolumnid}`, p.`{strcolumndesc}`, p.`{strcolumndescnorm}`, p.`{strcolumnpopularity}`
+                FROM ({" UNION ALL ".join([f"SELECT {q_expr} AS q"] * len(probe))}) q
+                JOIN `{strtablename}` p ON p.`{strcolumndescnorm}` = q.q
+                """,
+                tuple(probe),
+            )
+            for q, pid, name, norm, pop in tuple_cur.fetchall() or ():
+                found.setdefault(q, {
+                    strcolumnid: pid,
+                    strcolumndesc: name,
+                    strcolumndescnorm: norm,
+                    strcolumnpopularity: pop,
+                })
+        finally:
+            tuple_cur.close()
+    for q in probe:
+        hit = found.get(q)
+        _cache_put(_exact_cache, (strtablename, q), hit)
+        if hit:
+            results[q] = _search_result(hit, [], 0)
+            disk_entries.append((_disk_key(strtablename, q, has_fulltext, strtablesubstr), {"hit": hit}))
+        else:
+            misses.append(q)
+
+    # 2) + 3) Prefix pages of the misses, BATCH_PREFIX_CHUNK prefixes per query,
+    # ranked as soon as they arrive so only that many pages are held at once:
+    # one 2D cdist per prefix group, small pages take the fallback stages
+    groups: Dict[str, List[str]] = {}
+    for q in misses:
+        groups.setdefault(key_prefix(q.replace(" ", "")), []).append(q)
+    ranked_entries: List[Tuple[str, int, List[Dict[str, Any]]]] = []
+    prefixes = list(groups)
+    for j in range(0, len(prefixes), BATCH_PREFIX_CHUNK):
+        pages = _batch_prefix_pages(
+            cur,
+            strtablename,
+            strcolumnid,
+            strcolumndesc,
+            strcolumndescnorm,
+            strcolumndesckey,
+            strcolumnpopularity,
+            prefixes[j:j + BATCH_PREFIX_CHUNK],
+        )
+        for prefix, page in pages.items():
+            group = groups[prefix]
+
+            # Same short-circuit as fetch_candidates(): rows equal to the query
+            # are the only candidates, and rank_candidates() skips the scorer
+            wanted = set(group)
+            exact_rows: Dict[str, List[int]] = {}
+            for i, norm in enumerate(page.norms):
+                if norm in wanted:
+                    exact_rows.setdefault(norm, []).append(i)
+            for q, idx in exact_rows.items():
+                candidates = page.take(idx)
+                ranked = rank_candidates(
+                    strcolumnid,
+                    strcolumndesc,
+                    strcolumndescnorm,
+                    strcolumnpopularity,
+                    q,
+                    candidates,
+                )
+                ranked_entries.append((q, len(candidates), ranked))
+            group = [q for q in group if q not in exact_rows]
+            if not group:
+                continue
+
+            if len(page) >= MIN_CANDIDATES_OK:
+                scores = wratio_scores(group, page.norms, SCORE_CUTOFF)
+                for q, row_scores in zip(group, scores):
+                    ranked = _ranked_from_scores(
+                        strcolumnid,
+                        strcolumndesc,
+                        strcolumndescnorm,
+                        strcolumnpopularity,
+                        q,
+                        page,
+                        row_scores,
+                    )
+                    ranked_entries.append((q, len(page), ranked))
+                continue
+            for q in group:
+                candidates = fetch_candidates(
+                    cur,
+                    strtablename,
+                    strcolumnid,
+                    strcolumndesc,
+                    strcolumndescnorm,
+                    strcolumndesckey,
+                    strcolumnpopularity,
+                    q,
+                    q.replace(" ", ""),
+                    has_fulltext,
+                    strtablesubstr=strtablesubstr,
+                    prefix_batch=page,
+                )
+                ranked = rank_candidates(
+                    strcolumnid,
+                    strcolumndesc,
+                    strcolumndescnorm,
+                    strcolumnpopularity,
+                    q,
+                    candidates,
+                )
+                ranked_entries.append((q, len(candidates), ranked))
+
+    for q, candidates_count, ranked in ranked_entries:
+        _cache_put(_ranked_cache, (strtablename, q), (candidates_count, ranked))
+        disk_entries.append((
+            _disk_key(strtablename, q, has_fulltext, strtablesubstr),
+            {"hit": None, "ranked": ranked, "candidates_count": candidates_count},
+        ))
+        results[q] = _search_result(None, ranked, candidates_count)
+
+    # One SQLite transaction for the whole chunk
+    _disk_cache_put_many(disk_entries)
+    return results
+
+def _batch_prefix_pages(
+    cur,
+    strtablename: str,
+    strcolumnid: str,
+    strcolumndesc: str,
+    strcolumndescnorm: str,
+    strcolumndesckey: str,
+    strcolumnpopularity: str,
+    prefixes: Sequence[str],
+) -> Dict[str, CandBatch]:
+    """Return the prefix page of each key prefix, fetching missing ones in one query.
+
+    Cached pages are reused; the others come from a `UNION ALL` of prefix
+    queries, streamed (`SSCursor`) straight into per-prefix `CandBatch`es and
+    added to the prefix cache.
+    """
+    pages: Dict[str, CandBatch] = {}
+    for prefix in prefixes:
+        page = _cache_get(_prefix_cache, (strtablename, strcolumndesckey, prefix))
+        if page is not None:
+            pages[prefix] = page
+    missing = [prefix for prefix in prefixes if prefix not in pages]
+    if not missing:
+        return pages
+
+    selects = []
+    params: List[Any] = []
+    for prefix in missing:
+        selects.append(
+            f"""(SELECT %s, `{strcolumnid}`, `{strcolumndesc}`, `{strcolumndescnorm}`, `{strcolumnpopularity}`
+            FROM `{strtablename}`
+            WHERE `{strcolumndesckey}` LIKE CONCAT(%s, '%%')
+            LIMIT %s)"""
+        )
+        params.extend((prefix, prefix, PREFIX_LIMIT))
+    fetched = {prefix: CandBatch() for prefix in missing}
+    stream_cur = cur.connection.cursor(dbapi.cursors.SSCursor)
+    try:
+        stream_cur.execute(" UNION ALL ".join(selects), tuple(params))
+        while True:
+            chunk = stream_cur.fetchmany(STREAM_CHUNK)
+            if not chunk:
+                break
+            for prefix, pid, name, norm, pop in chunk:
+                batch = fetched[prefix]
+                batch.ids.append(pid)
+                batch.names.append(name)
+                batch.norms.append(norm or "")
+                batch.pops.append(pop)
+    finally:
+        stream_cur.close()
+    for prefix, batch in fetched.items():
+        _prefix_cache_put((strtablename, strcolumndesckey, prefix), batch)
+    pages.update(fetched)
+    return pages
+
 # ----------------------------
 # Main interactive loop
 # ----------------------------
 def main():
-    """Run the interactive CLI loop."""
+    """Run the interactive CLI loop, or batch mode when given a file argument.
+
+    Batch mode: `rapidfuzz_query.py NAMES_FILE` (or `-` for stdin) checks one
+    name per line with `batch_check()` and prints tab-separated
+    `input, status, name, id, score` lines.
+    """
     conn = get_db_connection()
     cur = conn.cursor()
 
@@ -538,12 +1608,65 @@ def main():
         sys.exit(2)
 
     has_fulltext = db_has_fulltext(cur, strtablename, strcolumndescnorm)
+    if RF_CACHE_DB:
+        open_disk_cache(RF_CACHE_DB)
+    has_name_filter = BLOOM_FILTER and load_name_filter(cur, strtablename, strcolumndescnorm)
+
+    if len(sys.argv) > 1:
+        if sys.argv[1] == "-":
+            names = [line.strip() for line in sys.stdin]
+        else:
+            with open(sys.argv[1], encoding="utf-8") as f:
+                names = [line.strip() for line in f]
+        names = [n for n in names if n]
+        results = batch_check(
+            cur,
+            strtablename,
+            strcolumnid,
+            strcolumndesc,
+            strcolumndescnorm,
+            strcolumndesckey,
+            strcolumnpopularity,
+            names,
+            has_fulltext,
+            strtablesubstr=PERSON_TABLE_SUBSTR or None,
+        )
+        for raw, result in zip(names, results):
+            best = result["best"]
+            if result["hit"] is not None:
+                status = "exact"
+            elif best is None:
+                status = "none"
+            else:
+                status = "auto" if result["auto"] else "suggest"
+            print("\t".join([
+                raw,
+                status,
+                str(best[strcolumndesc]) if best else "",
+                str(best[strcolumnid]) if best else "",
+                f"{best['SCORE']:.1f}" if best and "SCORE" in best else "",
+            ]))
+        close_disk_cache()
+        cur.close()
+        conn.close()
+        return
 
     print("Person name checker (RapidFuzz + MariaDB)")
     print(f"- DB: {DB_HOST}:{DB_PORT}/{DB_NAME}")
+    print(f"- Driver: {dbapi.__name__}")
     print(f"- Table: {strtablename}")
-    print(f"- FULLTEXT on PERSON_NAME_NORM: {'yes' if has_fulltext else 'no'}")
-    print("Type 'quit' to exit.\n")
+    print(f"- Result cache file: {RF_CACHE_DB or 'disabled'}")
+    if BLOOM_FILTER:
+        if has_name_filter:
+            bloom_status = "loaded"
+        elif BloomFilter is None:
+            bloom_status = "unavailable (pip install pybloom-live)"
+        else:
+            bloom_status = "disabled (PERSON_NAME_NORM collation is not _bin / _as_cs)"
+        print(f"- Exact-match Bloom filter: {bloom_status}")
+    print(f"- Substring fallback: {'Mroonga table ' + PERSON_TABLE_SUBSTR if PERSON_TABLE_SUBSTR else 'LIKE scan'}")
+    print(f"- FULLTEXT on PERSON_NAME_NORM: {'yes' if has_fulltext else 'no'}{' (ngram)' if has_fulltext and FTX_NGRAM else ''}")
+    print("Type 'clear' to reset the result cache, 'quit' to exit.\n")
 
     while True:
         raw = input("Enter a person name: ").strip()
@@ -551,6 +1674,10 @@ def main():
             continue
         if raw.lower() in ("quit", "exit", "q"):
             break
+        if raw.lower() == "clear":
+            clear_caches()
+            print(" Cache cleared.\n")
+            continue
 
         start_time = time.time()
 
@@ -565,6 +1692,7 @@ def main():
             raw,
             has_fulltext,
             timings_enabled=TIMINGS,
+            strtablesubstr=PERSON_TABLE_SUBSTR or None,
         )
 
         end_time = time.time()
@@ -615,11 +1743,13 @@ def main():
                 f"fetch_total={result['timings'].get('fetch_total', 0.0):.4f}s "
                 f"rank={result['timings'].get('rank', 0.0):.4f}s\n"
                 f"  candidates={result.get('candidates_count')} used={fetch_t.get('used')}\n"
-                f"  prefix={prefix_s:.4f}s n={fetch_t.get('prefix_n')}\n"
+                f"  prefix={prefix_s:.4f}s n={fetch_t.get('prefix_n')}"
+                f"{' (cached)' if fetch_t.get('prefix_cached') else ''}\n"
                 f"  fulltext={fulltext_s:.4f}s n={fetch_t.get('fulltext_n')}\n"
                 f"  like={like_s:.4f}s n={fetch_t.get('like_n')}\n"
             )
 
+    close_disk_cache()
     cur.close()
     conn.close()
 